@@ -1,88 +1,476 @@
-import base64
-import io
-import json
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import importlib.util
+import logging
+import math
 import os
-from typing import List
+import random
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Iterator, List
 
+import orjson
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    import httpx
+    import tiktoken
+
+try:  # SIMD-accelerated decoder for large image payloads, if installed
+    import pybase64 as base64
+except ImportError:  # pragma: no cover - optional dependency
+    import base64
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_config(name: str, default: str = "") -> str:
+    """Read a setting from the environment, falling back to Streamlit secrets."""
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:  # no secrets.toml configured
+        return default
+
+
+# Deployed instances configure these once; the sidebar key input is only shown
+# when no key is provided here.
+OPENAI_API_KEY = get_config("OPENAI_API_KEY")
+DEFAULT_LOGIN = "admin"
+LOGIN_USER = get_config("APP_USER", DEFAULT_LOGIN)
+LOGIN_PASSWORD = get_config("APP_PASSWORD", DEFAULT_LOGIN)
+# Header carrying the client address when running behind a trusted proxy.
+TRUSTED_PROXY_HEADER = get_config("TRUSTED_PROXY_HEADER")
+
+OPENAI_BASE = "https://api.openai.com/v1"
+CHAT_URL = f"{OPENAI_BASE}/chat/completions"
+IMAGES_URL = f"{OPENAI_BASE}/images/generations"
+SPEECH_URL = f"{OPENAI_BASE}/audio/speech"
+
+# Static request fields; per-call values are merged in with ``{**TEMPLATE, ...}``.
+CHAT_PAYLOAD = {"model": "gpt-3.5-turbo"}
+IMAGE_PAYLOAD = {
+    "model": "dall-e-3",
+    "n": 1,
+    "size": "1024x1024",
+    # Inline the image in the response instead of a second CDN download.
+    "response_format": "b64_json",
+}
+SPEECH_PAYLOAD = {"model": "tts-1"}
 
 # ----------------------------------------------------------------------
 # Helper functions for interacting with OpenAI API
 # ----------------------------------------------------------------------
 
+# Rate limits and transient server errors are retried with jittered
+# exponential backoff (RETRY_BACKOFF * 2 ** n seconds plus up to RETRY_BACKOFF
+# of jitter), honouring Retry-After, on both the pooled session and the async
+# client. Every wait is capped at MAX_RETRY_WAIT so a large Retry-After cannot
+# hang a session. Requests that may already have reached the server (read
+# timeouts, dropped connections) are never re-sent, since that could bill a
+# generation twice; only failures to connect are retried.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+MAX_RETRY_WAIT = 30
+
+
+def backoff_wait(seconds: float) -> float:
+    """Add jitter to a backoff delay and clamp it to ``MAX_RETRY_WAIT``."""
+    return min(seconds + random.uniform(0, RETRY_BACKOFF), MAX_RETRY_WAIT)
+
+
+class CappedRetry(Retry):
+    """urllib3 ``Retry`` with jittered backoff and a bounded Retry-After."""
+
+    def get_backoff_time(self) -> float:
+        return backoff_wait(super().get_backoff_time())
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_WAIT)
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Return a pooled HTTP session shared across reruns and users."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=50,
+        pool_maxsize=50,
+        max_retries=CappedRetry(
+            total=None,
+            connect=MAX_RETRIES,
+            read=0,
+            other=0,
+            status=MAX_RETRIES,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=sorted(RETRY_STATUSES),
+            allowed_methods=["POST", "GET"],
+            respect_retry_after_header=True,
+            # Hand the final response back so raise_for_status reports the real error.
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+SESSION = get_session()
+
+
+def _warm_up() -> None:
+    """Open a keep-alive connection to OpenAI so the first real call skips the handshake."""
+    try:
+        SESSION.head(f"{OPENAI_BASE}/models", timeout=5)
+    except requests.exceptions.RequestException:
+        pass  # best effort; the first real request will connect instead
+
+
+@st.cache_resource
+def start_warm_up() -> threading.Thread:
+    """Run the connection warm-up once per server process, in the background."""
+    thread = threading.Thread(target=_warm_up, daemon=True)
+    thread.start()
+    return thread
+
+
+start_warm_up()
+
+
+def _headers(api_key: str) -> dict:
+    """Return the per-request auth header; Content-Type is set on the clients."""
+    return {"Authorization": f"Bearer {api_key}"}
+
+
 def call_openai(url: str, payload: dict, api_key: str, stream: bool = False) -> requests.Response:
     """Send a POST request to the OpenAI API with basic error handling."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
     try:
-        response = requests.post(url, headers=headers, json=payload, stream=stream, timeout=60)
+        response = SESSION.post(
+            url,
+            headers=_headers(api_key),
+            data=orjson.dumps(payload),
+            stream=stream,
+            timeout=60,
+        )
         response.raise_for_status()
         return response
     except requests.exceptions.RequestException as exc:
         raise RuntimeError(str(exc)) from exc
 
 
+def sse_deltas(response: requests.Response) -> Iterator[str]:
+    """Yield content deltas from a streamed chat completion response."""
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            data = line[6:]
+            if data == "[DONE]":
+                break
+            yield orjson.loads(data)["choices"][0]["delta"].get("content") or ""
+    finally:
+        response.close()
+
+
+MAX_CONCURRENT_REQUESTS = 8
+# Upper bound so a stuck request cannot hang a session.
+ASYNC_TIMEOUT = 180
+
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return a long-lived event loop running in a background thread.
+
+    The async client keeps its pooled connections bound to the loop it was
+    first used on, so all coroutines are scheduled on this one loop instead of
+    a fresh ``asyncio.run`` per rerun.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+@st.cache_resource
+def get_async_client() -> httpx.AsyncClient:
+    """Return a pooled client (HTTP/2 when available) for concurrent OpenAI requests."""
+    import httpx  # deferred: only needed once a feature fans out requests
+
+    return httpx.AsyncClient(
+        timeout=60,
+        headers={"Content-Type": "application/json"},
+        # The transport's own retries only cover failures to connect.
+        transport=httpx.AsyncHTTPTransport(
+            # HTTP/2 needs the optional h2 package (httpx[http2]).
+            http2=importlib.util.find_spec("h2") is not None,
+            retries=MAX_RETRIES,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        ),
+    )
+
+
+def run_async(coro):
+    """Run ``coro`` on the shared event loop and wait for its result."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return future.result(timeout=ASYNC_TIMEOUT)
+    except TimeoutError as exc:
+        future.cancel()
+        raise RuntimeError("Timed out waiting for OpenAI") from exc
+
+
+async def _post_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: dict,
+    headers: dict,
+    semaphore: asyncio.Semaphore,
+) -> dict:
+    """POST a single payload, backing off on rate limits and server errors."""
+    import httpx
+
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            async with semaphore:
+                response = await client.post(
+                    url, content=orjson.dumps(payload), headers=headers
+                )
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            try:
+                wait = min(float(response.headers.get("Retry-After", "")), MAX_RETRY_WAIT)
+            except ValueError:
+                wait = backoff_wait(RETRY_BACKOFF * 2**attempt)
+            await asyncio.sleep(wait)
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        raise RuntimeError(str(exc)) from exc
+    return orjson.loads(response.content)
+
+
+async def _post_many(
+    client: httpx.AsyncClient, url: str, payloads: List[dict], api_key: str
+) -> List[dict]:
+    """POST several payloads concurrently and return their JSON bodies in order.
+
+    ``client`` is resolved by the caller on the script thread; this coroutine
+    runs on the background loop, outside Streamlit's script context.
+    """
+    headers = _headers(api_key)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return await asyncio.gather(
+        *(_post_with_retry(client, url, p, headers, semaphore) for p in payloads)
+    )
+
+
+@st.cache_resource
+def get_encoder() -> tiktoken.Encoding:
+    """Return the GPT-3.5 Turbo tokenizer, loaded once per process."""
+    import tiktoken  # deferred: only needed for chat trimming and long text
+
+    return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+
+def split_by_tokens(text: str, target: int, overlap: int = 0) -> List[str]:
+    """Split ``text`` into chunks of at most ``target`` tokens.
+
+    Consecutive chunks share ``overlap`` tokens so context is not lost at the
+    boundaries.
+    """
+    encoder = get_encoder()
+    tokens = encoder.encode(text)
+    # Use the fewest chunks that fit, then even out their sizes so the last one
+    # is not a sliver made up mostly of overlap.
+    count = max(1, math.ceil((len(tokens) - overlap) / (target - overlap)))
+    step = math.ceil((len(tokens) - overlap) / count)
+    return [
+        encoder.decode(tokens[i * step : i * step + step + overlap])
+        for i in range(count)
+    ]
+
+
+# Identical inputs are served from Streamlit's process-wide cache instead of
+# re-hitting OpenAI. Cached fetchers take the raw key as ``_api_key`` so
+# Streamlit leaves it out of the cache key; ``key_hash`` scopes entries per key.
+CACHE_TTL = 24 * 3600
+CACHE_MAX_ENTRIES = 256
+# Images and audio are several MB each, so far fewer are kept in memory.
+BINARY_CACHE_MAX_ENTRIES = 16
+
+
+def hash_api_key(api_key: str) -> str:
+    """Return a stable, non-reversible identifier for ``api_key``."""
+    return hashlib.blake2s(api_key.encode()).hexdigest()
+
+
+def generate_image_bytes(payload: dict, api_key: str) -> bytes:
+    """Generate an image for ``payload`` and return the decoded PNG bytes."""
+    response = call_openai(IMAGES_URL, payload, api_key)
+    return base64.b64decode(orjson.loads(response.content)["data"][0]["b64_json"])
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=BINARY_CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_image(
+    payload: dict, key_hash: str, _api_key: str, _image: bytes | None = None
+) -> bytes:
+    """Return the cached image for ``payload``, generating it on a miss.
+
+    ``_image`` stores already generated bytes instead; it is only used by
+    ``regenerate_image`` after clearing the old entry.
+    """
+    return _image if _image is not None else generate_image_bytes(payload, _api_key)
+
+
+def regenerate_image(payload: dict, api_key: str) -> bytes:
+    """Generate a new image and make it the cached result for ``payload``."""
+    image = generate_image_bytes(payload, api_key)
+    key_hash = hash_api_key(api_key)
+    fetch_image.clear(payload, key_hash, api_key)
+    return fetch_image(payload, key_hash, api_key, image)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_completions(payloads: List[dict], key_hash: str, _api_key: str) -> List[str]:
+    """Run chat completions for ``payloads`` concurrently and return their texts."""
+    results = run_async(_post_many(get_async_client(), CHAT_URL, payloads, _api_key))
+    return [data["choices"][0]["message"]["content"] for data in results]
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=BINARY_CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_speech(payload: dict, key_hash: str, _api_key: str) -> bytes:
+    """Synthesize speech for ``payload`` and return the MP3 bytes."""
+    return call_openai(SPEECH_URL, payload, _api_key).content
+
+
 def generate_image(api_key: str) -> None:
     """UI and logic for DALL-E image generation."""
     st.header("Image Generation (DALL-E 3)")
-    prompt = st.text_input("Image prompt")
-    if st.button("Generate Image"):
+    with st.form(key="image_form", clear_on_submit=False):
+        prompt = st.text_input("Image prompt")
+        regenerate = st.checkbox("Regenerate (ignore cached image)")
+        submitted = st.form_submit_button("Generate Image")
+    if submitted:
         if not prompt:
             st.warning("Please enter a prompt.")
             return
-        payload = {
-            "model": "dall-e-3",
-            "prompt": prompt,
-            "n": 1,
-            "size": "1024x1024",
-        }
+        payload = {**IMAGE_PAYLOAD, "prompt": prompt}
         try:
             with st.spinner("Generating image..."):
-                response = call_openai(
-                    "https://api.openai.com/v1/images/generations", payload, api_key
-                )
-                data = response.json()
-                image_url = data["data"][0]["url"]
-                img_bytes = requests.get(image_url).content
+                if regenerate:
+                    img_bytes = regenerate_image(payload, api_key)
+                else:
+                    img_bytes = fetch_image(payload, hash_api_key(api_key), api_key)
             st.image(img_bytes)
-            st.download_button("Download Image", img_bytes, file_name="generated.png")
+            st.download_button(
+                "Download Image", img_bytes, file_name="generated.png", mime="image/png"
+            )
         except Exception as e:  # noqa: BLE001
             st.error(f"OpenAI API Error: {e}")
 
 
+TEXT_PROMPTS = {
+    "summarize": "Summarize the following text.",
+    "rewrite": "Rewrite the following text to improve clarity.",
+}
+TEXT_LABELS = {"summarize": "Summary", "rewrite": "Rewritten Text"}
+REDUCE_PROMPT = "Combine these partial summaries into a single coherent summary."
+# Inputs above this are rejected locally rather than failing after a round trip;
+# the reply must also fit in GPT-3.5 Turbo's 16k context window.
+MAX_TEXT_TOKENS = 8000
+# Summaries of longer inputs are built map-reduce style: chunks in parallel,
+# then a final call that merges the partial summaries. MAX_SUMMARY_TOKENS caps
+# the fan-out at a handful of requests.
+SUMMARY_CHUNK_TOKENS = 4000
+SUMMARY_CHUNK_OVERLAP = 100
+MAX_SUMMARY_TOKENS = 48000
+MAX_SUMMARY_ROUNDS = 2
+
+
+def text_payload(system_prompt: str, text: str) -> dict:
+    """Build a chat completion payload applying ``system_prompt`` to ``text``."""
+    return {
+        **CHAT_PAYLOAD,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text},
+        ],
+    }
+
+
+def map_summaries(text: str, api_key: str) -> str:
+    """Summarize ``text`` chunk by chunk, concurrently, and join the results."""
+    chunks = split_by_tokens(text, SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP)
+    payloads = [text_payload(TEXT_PROMPTS["summarize"], chunk) for chunk in chunks]
+    return "\n\n".join(fetch_completions(payloads, hash_api_key(api_key), api_key))
+
+
 def text_tools(api_key: str) -> None:
     """UI and logic for text summarization and rewriting."""
     st.header("Text Tools (GPT-3.5 Turbo)")
-    user_text = st.text_area("Enter text")
-    col1, col2 = st.columns(2)
     action = None
-    with col1:
-        if st.button("Summarize"):
-            action = "summarize"
-    with col2:
-        if st.button("Rewrite"):
-            action = "rewrite"
+    with st.form(key="text_form", clear_on_submit=False):
+        user_text = st.text_area("Enter text")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.form_submit_button("Summarize"):
+                action = "summarize"
+        with col2:
+            if st.form_submit_button("Rewrite"):
+                action = "rewrite"
+        with col3:
+            if st.form_submit_button("Summarize + Rewrite"):
+                action = "both"
 
     if action and user_text.strip():
-        if action == "summarize":
-            system_prompt = "Summarize the following text."
-        else:
-            system_prompt = "Rewrite the following text to improve clarity."
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_text},
-        ]
-        payload = {"model": "gpt-3.5-turbo", "messages": messages}
+        actions = list(TEXT_PROMPTS) if action == "both" else [action]
         try:
+            n_tokens = len(get_encoder().encode(user_text))
+            limit = MAX_SUMMARY_TOKENS if action == "summarize" else MAX_TEXT_TOKENS
+            if n_tokens > limit:
+                st.warning(f"Text is too long; please keep it under {limit} tokens.")
+                return
+            payloads = []
+            for name in actions:
+                if name == "summarize" and n_tokens > MAX_TEXT_TOKENS:
+                    with st.spinner("Summarizing sections..."):
+                        partials = user_text
+                        for _ in range(MAX_SUMMARY_ROUNDS):
+                            partials = map_summaries(partials, api_key)
+                            if len(get_encoder().encode(partials)) <= MAX_TEXT_TOKENS:
+                                break
+                        else:
+                            raise RuntimeError("Partial summaries are too long to combine.")
+                    payloads.append(text_payload(REDUCE_PROMPT, partials))
+                else:
+                    payloads.append(text_payload(TEXT_PROMPTS[name], user_text))
+
+            if len(payloads) == 1:
+                with st.spinner("Generating..."):
+                    response = call_openai(
+                        CHAT_URL, {**payloads[0], "stream": True}, api_key, stream=True
+                    )
+                # Stream for a fast first token, then swap in the same copyable
+                # text box the combined path uses.
+                placeholder = st.empty()
+                out_text = placeholder.write_stream(sse_deltas(response))
+                placeholder.text_area(TEXT_LABELS[action], value=out_text, height=200)
+                return
             with st.spinner("Generating..."):
-                response = call_openai(
-                    "https://api.openai.com/v1/chat/completions", payload, api_key
-                )
-                out_text = response.json()["choices"][0]["message"]["content"]
-            st.text_area("Output", value=out_text, height=200)
+                # Independent requests: wall time is the slowest one, not the sum.
+                outputs = fetch_completions(payloads, hash_api_key(api_key), api_key)
+            for name, out_text in zip(actions, outputs):
+                st.text_area(TEXT_LABELS[name], value=out_text, height=200)
         except Exception as e:  # noqa: BLE001
             st.error(f"OpenAI API Error: {e}")
 
@@ -90,59 +478,249 @@ def text_tools(api_key: str) -> None:
 def tts_tool(api_key: str) -> None:
     """UI and logic for text-to-speech generation."""
     st.header("Voice Generation (OpenAI TTS)")
-    text = st.text_area("Text to convert to speech")
-    voice = st.selectbox(
-        "Voice", ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
-    )
-    if st.button("Generate Voice"):
+    with st.form(key="tts_form", clear_on_submit=False):
+        text = st.text_area("Text to convert to speech")
+        voice = st.selectbox(
+            "Voice", ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+        )
+        submitted = st.form_submit_button("Generate Voice")
+    if submitted:
         if not text.strip():
             st.warning("Please enter text.")
             return
-        payload = {"model": "tts-1", "input": text, "voice": voice}
+        payload = {**SPEECH_PAYLOAD, "input": text, "voice": voice}
         try:
             with st.spinner("Generating audio..."):
-                response = call_openai(
-                    "https://api.openai.com/v1/audio/speech", payload, api_key
-                )
-                audio_bytes = response.content
+                audio_bytes = fetch_speech(payload, hash_api_key(api_key), api_key)
             st.audio(audio_bytes)
             st.download_button("Download Audio", audio_bytes, file_name="speech.mp3")
         except Exception as e:  # noqa: BLE001
             st.error(f"OpenAI API Error: {e}")
 
 
+# Only the most recent messages are sent with each request; older ones are
+# folded into a short running summary so the payload stays bounded. Once a
+# limit is exceeded the window is cut down to the lower TRIM_* marks, so the
+# extra summary call happens every few exchanges rather than on every send.
+MAX_MESSAGES = 20
+MAX_INPUT_TOKENS = 3000
+TRIM_MESSAGES = MAX_MESSAGES // 2
+TRIM_INPUT_TOKENS = MAX_INPUT_TOKENS // 2
+# Transcript cap for the summary call, so folding old messages cannot overflow.
+SUMMARY_INPUT_TOKENS = 2 * MAX_INPUT_TOKENS
+CHAT_SYSTEM_PROMPT = "You are a helpful assistant."
+# Turns shown outside the "Older turns" expander on each rerun.
+CHAT_RENDER_LIMIT = 20
+
+
+def count_tokens(message: dict) -> int:
+    """Approximate the prompt tokens ``message`` contributes to a request."""
+    # Each message carries a few tokens of role/formatting overhead.
+    return len(get_encoder().encode(message["content"])) + 4
+
+
+def summarize_turns(memory: str, turns: List[dict], api_key: str) -> str:
+    """Fold ``turns`` into the running conversation summary ``memory``."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    tokens = get_encoder().encode(transcript)
+    if len(tokens) > SUMMARY_INPUT_TOKENS:
+        # Keep the most recent part of the dropped messages.
+        transcript = get_encoder().decode(tokens[-SUMMARY_INPUT_TOKENS:])
+    if memory:
+        transcript = f"Earlier summary: {memory}\n{transcript}"
+    payload = {
+        **CHAT_PAYLOAD,
+        "messages": [
+            {
+                "role": "system",
+                "content": "Condense this conversation into a brief summary that "
+                "keeps any facts needed to continue it.",
+            },
+            {"role": "user", "content": transcript},
+        ],
+        "max_tokens": 200,
+    }
+    response = call_openai(CHAT_URL, payload, api_key)
+    return orjson.loads(response.content)["choices"][0]["message"]["content"].strip()
+
+
+def build_chat_messages(api_key: str) -> List[dict]:
+    """Return the request messages for the current chat, trimming old messages."""
+    history = st.session_state.chat_history
+    start = st.session_state.chat_context_start
+    window = history[start:]
+    sizes = [count_tokens(m) for m in window]
+
+    drop = 0
+    if len(window) > MAX_MESSAGES or sum(sizes) > MAX_INPUT_TOKENS:
+        # Always keep the latest message; drop from the front to the low marks.
+        drop = max(0, len(window) - TRIM_MESSAGES)
+        total = sum(sizes[drop:])
+        while drop < len(window) - 1 and total > TRIM_INPUT_TOKENS:
+            total -= sizes[drop]
+            drop += 1
+
+    if drop:
+        st.session_state.chat_memory = summarize_turns(
+            st.session_state.chat_memory, window[:drop], api_key
+        )
+        st.session_state.chat_context_start = start + drop
+
+    messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT}]
+    memory = st.session_state.chat_memory
+    if memory:
+        summary = f"Summary of the earlier conversation: {memory}"
+        messages.append({"role": "system", "content": summary})
+    messages.extend(history[st.session_state.chat_context_start:])
+    return messages
+
+
+def render_messages(messages: List[dict]) -> None:
+    """Render chat messages as chat bubbles."""
+    for msg in messages:
+        st.chat_message(msg["role"]).markdown(msg["content"])
+
+
+def send_chat_message(user_input: str, api_key: str) -> None:
+    """Append ``user_input`` to the chat and stream the assistant's reply."""
+    history = st.session_state.chat_history
+    message = {"role": "user", "content": user_input}
+    history.append(message)
+    try:
+        # Trimming always keeps the latest message, so it alone must fit.
+        if count_tokens(message) > MAX_INPUT_TOKENS:
+            history.pop()
+            st.warning(f"Message is too long; please keep it under {MAX_INPUT_TOKENS} tokens.")
+            return
+        with st.spinner("Generating response..."):
+            messages = build_chat_messages(api_key)
+            payload = {**CHAT_PAYLOAD, "messages": messages, "stream": True}
+            response = call_openai(CHAT_URL, payload, api_key, stream=True)
+        # Show tokens as they arrive; the history loop in chat_tool re-renders
+        # the finished reply, so the live placeholder is cleared after.
+        placeholder = st.empty()
+        reply = placeholder.write_stream(sse_deltas(response))
+        placeholder.empty()
+        history.append({"role": "assistant", "content": reply})
+    except Exception as e:  # noqa: BLE001
+        # Drop the unanswered message so it is not resent with the next one.
+        history.pop()
+        st.error(f"OpenAI API Error: {e}")
+
+
 def chat_tool(api_key: str) -> None:
     """UI and logic for a simple chat interface."""
     st.header("Simple Chat (GPT-3.5 Turbo)")
     if "chat_history" not in st.session_state:
         st.session_state.chat_history: List[dict] = []
+        st.session_state.chat_context_start = 0
+        st.session_state.chat_memory = ""
 
-    user_input = st.text_area("Your message", key="chat_input")
-    if st.button("Send"):
+    with st.form(key="chat_form", clear_on_submit=False):
+        user_input = st.text_area("Your message", key="chat_input")
+        submitted = st.form_submit_button("Send")
+    if submitted:
         if user_input.strip():
-            st.session_state.chat_history.append({"role": "user", "content": user_input})
-            messages = [
-                {"role": "system", "content": "You are a helpful assistant."},
-                *st.session_state.chat_history,
-            ]
-            payload = {"model": "gpt-3.5-turbo", "messages": messages}
-            try:
-                with st.spinner("Generating response..."):
-                    response = call_openai(
-                        "https://api.openai.com/v1/chat/completions", payload, api_key
-                    )
-                    reply = response.json()["choices"][0]["message"]["content"]
-                st.session_state.chat_history.append(
-                    {"role": "assistant", "content": reply}
-                )
-            except Exception as e:  # noqa: BLE001
-                st.error(f"OpenAI API Error: {e}")
+            send_chat_message(user_input, api_key)
+
+    history = st.session_state.chat_history
+    if len(history) > CHAT_RENDER_LIMIT:
+        with st.expander("Older turns"):
+            render_messages(history[:-CHAT_RENDER_LIMIT])
+    render_messages(history[-CHAT_RENDER_LIMIT:])
+
+
+# Token buckets for login attempts. Each client gets LOGIN_BURST attempts,
+# refilled at LOGIN_REFILL_PER_MINUTE. Failed attempts from every client also
+# draw on one shared budget, a backstop for clients that cannot be told apart
+# or that reconnect to get a fresh session. Refilled buckets are pruned at most
+# once per LOGIN_PRUNE_INTERVAL seconds.
+LOGIN_BURST = 5
+LOGIN_REFILL_PER_MINUTE = 5
+GLOBAL_LOGIN_FAILURES = 50
+GLOBAL_LOGIN_REFILL_PER_MINUTE = 50
+LOGIN_PRUNE_INTERVAL = 60
+
+
+def _refill(bucket: tuple, now: float, burst: int, per_minute: int) -> float:
+    """Return the tokens in a ``(tokens, last_ts)`` bucket at time ``now``."""
+    tokens, last = bucket
+    return min(burst, tokens + (now - last) * per_minute / 60)
 
-    for msg in st.session_state.chat_history:
-        if msg["role"] == "user":
-            st.write(f"**You:** {msg['content']}")
-        else:
-            st.write(f"**Assistant:** {msg['content']}")
+
+class LoginLimiter:
+    """Login rate limits shared by every session in the server process."""
+
+    def __init__(self) -> None:
+        self._buckets: dict = {}
+        self._failures = (float(GLOBAL_LOGIN_FAILURES), time.monotonic())
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def allow(self, client: str, consume: bool = True) -> bool:
+        """Check (and optionally spend) a login attempt from ``client``."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            failures = _refill(
+                self._failures, now, GLOBAL_LOGIN_FAILURES, GLOBAL_LOGIN_REFILL_PER_MINUTE
+            )
+            if failures < 1:
+                return False
+            bucket = self._buckets.get(client, (LOGIN_BURST, now))
+            tokens = _refill(bucket, now, LOGIN_BURST, LOGIN_REFILL_PER_MINUTE)
+            if tokens < 1:
+                return False
+            if consume:
+                self._buckets[client] = (tokens - 1, now)
+            return True
+
+    def record_failure(self) -> None:
+        """Spend one token of the shared failed-attempt budget."""
+        with self._lock:
+            now = time.monotonic()
+            failures = _refill(
+                self._failures, now, GLOBAL_LOGIN_FAILURES, GLOBAL_LOGIN_REFILL_PER_MINUTE
+            )
+            self._failures = (max(failures - 1, 0.0), now)
+
+    def _prune(self, now: float) -> None:
+        """Drop refilled client buckets; runs at most once per interval."""
+        if now < self._next_prune:
+            return
+        self._next_prune = now + LOGIN_PRUNE_INTERVAL
+        for client, bucket in list(self._buckets.items()):
+            if _refill(bucket, now, LOGIN_BURST, LOGIN_REFILL_PER_MINUTE) >= LOGIN_BURST:
+                del self._buckets[client]
+
+
+@st.cache_resource
+def get_login_limiter() -> LoginLimiter:
+    """Return the process-wide login rate limiter."""
+    return LoginLimiter()
+
+
+def client_address() -> str:
+    """Return a rate-limit key for the current session.
+
+    Behind a reverse proxy, set TRUSTED_PROXY_HEADER (e.g. ``X-Forwarded-For``)
+    so clients are keyed on the address the proxy reports rather than the
+    proxy's own. Without a usable address, a random per-session id is used and
+    the shared failure budget is the effective limit.
+    """
+    context = getattr(st, "context", None)
+    if TRUSTED_PROXY_HEADER:
+        forwarded = (getattr(context, "headers", None) or {}).get(TRUSTED_PROXY_HEADER, "")
+        # The trusted proxy appends the real client last; earlier entries are
+        # supplied by the client and can be forged.
+        address = forwarded.split(",")[-1].strip()
+    else:
+        address = getattr(context, "ip_address", None)
+    if address:
+        return address
+    if "login_client" not in st.session_state:
+        st.session_state.login_client = f"session:{uuid.uuid4().hex}"
+    return st.session_state.login_client
 
 
 def login() -> bool:
@@ -153,15 +731,32 @@ def login() -> bool:
     if st.session_state.logged_in:
         return True
 
-    st.title("Login")
-    username = st.text_input("Username")
-    password = st.text_input("Password", type="password")
-    if st.button("Login"):
-        if username == "admin" and password == "admin":
+    limiter = get_login_limiter()
+    client = client_address()
+    if not limiter.allow(client, consume=False):
+        st.error("Too many attempts. Please try again later.")
+        st.stop()
+
+    # Render into a placeholder so a successful login can clear the form and
+    # fall straight through to the app without another script rerun.
+    placeholder = st.empty()
+    with placeholder.container():
+        st.title("Login")
+        username = st.text_input("Username")
+        password = st.text_input("Password", type="password")
+        clicked = st.button("Login")
+    if clicked:
+        if not limiter.allow(client):
+            st.error("Too many attempts. Please try again later.")
+            return False
+        user_ok = hmac.compare_digest(username.encode(), LOGIN_USER.encode())
+        password_ok = hmac.compare_digest(password.encode(), LOGIN_PASSWORD.encode())
+        if user_ok and password_ok:
             st.session_state.logged_in = True
-            st.experimental_rerun()
-        else:
-            st.error("Invalid username or password")
+            placeholder.empty()
+            return True
+        limiter.record_failure()
+        st.error("Invalid username or password")
     return False
 
 
@@ -169,41 +764,47 @@ def main() -> None:
     """Main entry point for the Streamlit app."""
     st.set_page_config(page_title="AI Service App")
 
+    # A server-side key behind the default password would let anyone spend it.
+    if OPENAI_API_KEY and LOGIN_PASSWORD == DEFAULT_LOGIN:
+        logger.error(
+            "OPENAI_API_KEY is configured but APP_PASSWORD is the default; "
+            "refusing to serve until APP_PASSWORD is set."
+        )
+        st.error("This app is not configured yet. Please contact the administrator.")
+        st.stop()
+
     if not login():
         st.stop()
 
     # Sidebar configuration for API key and tool selection
-    if "api_key" not in st.session_state:
-        st.session_state.api_key = ""
-
+    api_key = OPENAI_API_KEY
     with st.sidebar:
         st.header("Configuration")
-        api_key = st.text_input(
-            "OpenAI API Key",
-            value=st.session_state.api_key,
-            type="password",
-            key="api_key_input",
-        )
-        st.session_state.api_key = api_key
-        # In production, store the API key securely in environment variables
-        # e.g., os.environ.get("OPENAI_API_KEY") and do not expose it in the UI.
+        if not api_key:
+            api_key = st.text_input(
+                "OpenAI API Key",
+                value=st.session_state.get("api_key", ""),
+                type="password",
+                key="api_key_input",
+            )
+            st.session_state.api_key = api_key
         tool = st.selectbox(
             "Select Tool",
             ["Image", "Text", "Voice", "Chat"],
         )
 
-    if not st.session_state.api_key:
+    if not api_key:
         st.warning("Please enter your OpenAI API key in the sidebar to continue.")
         st.stop()
 
     if tool == "Image":
-        generate_image(st.session_state.api_key)
+        generate_image(api_key)
     elif tool == "Text":
-        text_tools(st.session_state.api_key)
+        text_tools(api_key)
     elif tool == "Voice":
-        tts_tool(st.session_state.api_key)
+        tts_tool(api_key)
     elif tool == "Chat":
-        chat_tool(st.session_state.api_key)
+        chat_tool(api_key)
 
 
 if __name__ == "__main__":  # pragma: no cover - entry point